@@ -48,32 +48,92 @@ a virtualenv 'rinexx' is supplied with the minimum python modules for building t
 
 1. improvements in the code: 
 - get rid of so many inline functions
-- split long funtions like read_file_csv() which not only reads the files but merges the dataframes
 2. produce height difference? (what for??)
 3. run it in Red Hat?
 
 """
 
 import os
+import re
 import sys
 import subprocess
+import multiprocessing
+import collections
+import hashlib
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 import math
 import pandas as pd
 import numpy as np
+import matplotlib
+# ----- plots are only saved to png for the report, use the non interactive Agg backend so Tk is not involved
+matplotlib.use('Agg')
 import matplotlib.pyplot as plt
+import matplotlib.dates as mdates
+from matplotlib.figure import Figure
+from matplotlib.collections import LineCollection
+from matplotlib.lines import Line2D
 import tkinter as tk
 from tkinter import ttk
 import tkinter.filedialog as filedialog
 from fpdf import FPDF
 import datetime
+try:
+    import numba
+except ImportError:
+    numba = None
+try:
+    import pyarrow
+    import pyarrow.csv
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
 
 pd.options.display.width = 0
+plt.rcParams['font.size'] = 6
 STAGE= 'production'
 #STAGE= 'testing'
 VERSION= 'Version 2.1 - Feb 2023'
-
-
-
+GPS_EPOCH = datetime.datetime(1980, 1, 6)
+
+# ----- patterns to identify the lat, lon, gyro and gps time columns of the TRINAV/SPN file
+LAT_RE = re.compile(r'LAT|lat|Lat')
+LON_RE = re.compile(r'LON|lon|Lon')
+GYRO_RE = re.compile(r'[Gg]yro|THDG')
+GPSTIME_RE = re.compile(r'GPSTIME')
+
+# ----- rinex columns used for the verification and their types
+RINEX_DTYPES = {'latitude_decimal_degree': np.float64, 'longitude_decimal_degree': np.float64,
+                'decimal_hour': np.float64, 'day_of_year': np.int64, 'year': np.int64}
+
+# ----- number of rinex records read at once, and most records of each chunk kept for the plots
+RINEX_CHUNKSIZE = 500000
+# ----- bytes of the rinex file parsed at once by the pyarrow reader, about the same number of records
+RINEX_BLOCKSIZE = 32 << 20
+# ----- parsed navigation logs and merged rinex records are kept as parquet files in the user cache directory,
+# ----- when pyarrow is installed. Files unused for RINEX_CACHE_DAYS are removed, and the least recently used
+# ----- above RINEX_CACHE_SIZE bytes. Rinex files larger than RINEX_CACHE_FILE_SIZE bytes are not cached
+RINEX_CACHE_DIR = os.path.join(os.environ.get('LOCALAPPDATA') or os.environ.get('XDG_CACHE_HOME')
+                               or os.path.join(os.path.expanduser('~'), '.cache'), 'rinex_verification')
+RINEX_CACHE_DAYS = 30
+RINEX_CACHE_SIZE = 2 << 30
+RINEX_CACHE_FILE_SIZE = 256 << 20
+# ----- digest of the script, taken once by script_key
+SCRIPT_KEY = None
+PLOT_ROWS_PER_CHUNK = 20000
+# ----- most points drawn per line, about the width of the saved figure in pixels several times over
+PLOT_POINTS = 4000
+
+
+
+
+# ----- report header entries and scope of work, read once from the window
+Info = collections.namedtuple('Info', 'vessel location client jobno scope')
+
+# ----- raised when the rinex file and the navigation log have no epoch in common
+class NoMatchingEpoch(ValueError):
+    pass
 
 # ----- for pyinstaller
 def resource_path(relative_path):
@@ -90,48 +150,36 @@ def resource_path(relative_path):
 
 # ----- produces a timetag to append to report name
 def timetag():
-    now = datetime.datetime.now()
-    return str(now.year) + str(now.month).zfill(2) + str(now.day).zfill(2) + "_" +  str(now.hour).zfill(2) + str(now.minute).zfill(2) + str(now.second).zfill(2)
+    return datetime.datetime.now().strftime('%Y%m%d_%H%M%S')
 
 # ----- helper funtion to convert a gps epoch into datetime
 def gps2time(gpstime):
-    GPS_EPOCH = datetime.datetime(1980, 1, 6)
     return GPS_EPOCH + datetime.timedelta(seconds=gpstime)
 
 # ----- reverse helper funtion to convert a datetime into gps epoch
 def time2gps(dat):
-    GPS_EPOCH = datetime.datetime(1980, 1, 6)
     delta = dat - GPS_EPOCH
     return (delta.days * 24 * 60 * 60) + delta.seconds
 
-# ----- helper function to convert a dms lat/lon to decimal degree
-def dms_to_dec(_dms):
-    dms = str(_dms)
-    
+# ----- helper function to convert a column of dms lat/lon to decimal degree
+def dms_to_dec_series(s):
+    # ----- numeric columns are already in decimal degree
+    if pd.api.types.is_numeric_dtype(s):
+        return s
+
     #----- SPN logs xx:xx:xxN, so put a space in between to better handle the dms string
-    dms = dms.replace(":"," ")
-    dms = dms.replace("E"," E")
-    dms = dms.replace("N"," N")
-    dms = dms.replace("W"," W")
-    dms = dms.replace("S"," S")
-          
-    if len(dms.split()) < 3:
-        return _dms
-    else:
-        
-        deg = float(dms.split()[0])
-        min = float(dms.split()[1])
-        if len(dms.split()) == 4:
-            sec = float(dms.split()[2])
+    dms = s.astype(str).str.replace(':', ' ', regex=False).str.replace(r'([ENWS])', r' \1', regex=True)
+    parts = dms.str.split()
+    n_parts = parts.str.len()
 
-        else:
-            sec = 0
-        if "S" in dms:
-            return (deg + (min / 60) + (sec / 3600)) * (-1)
-        elif "W" in dms:
-            return (deg + (min / 60) + (sec / 3600)) * (-1)
-        else:
-            return deg + (min / 60) + (sec / 3600)
+    # ----- values with less than 3 parts are not dms, leave them as they are
+    is_dms = n_parts >= 3
+    deg = pd.to_numeric(parts.str[0].where(is_dms))
+    minutes = pd.to_numeric(parts.str[1].where(is_dms))
+    sec = pd.to_numeric(parts.str[2].where(n_parts == 4)).fillna(0)
+    sign = np.where(dms.str.contains('[SW]', regex=True), -1.0, 1.0)
+
+    return ((deg + (minutes / 60) + (sec / 3600)) * sign).where(is_dms, s)
 
 # ----- helper function to convert strings to float replacing empty strings with np.nan
 # ----- not in use now, but might come handy for other logging systems
@@ -141,257 +189,508 @@ def to_float_np(s):
     else:
         return float(s)
         
-# ----- helper function to convert strings to float
-def to_float(s):
-    return float(s)
-    
-# ----- helper function to convert decimal hours to hours, minutes and seconds
-def dec_hour_to_hms(dec_hour):
-    hours = int(dec_hour)
-    minutes = int(60 * (dec_hour % 1))
-    seconds = int(60 * (minutes % 1))
-    return (str(hours).zfill(2), str(minutes).zfill(2), str(seconds).zfill(2))
-
 # ----- function to read start and stop of Rinex/Navigation logging period
 def start_stop_df_m(df):
-    reverse = 0
-    
-    # ----- slice a column as a list. get the first year and day. Use it for both start and end of matching records
-    year = str(df.year[0])    
-    day = str(df.day_of_year[0]).zfill(3)
-
-    # ----- slice a column as a list. get the first and last decimal hour of matching records
-    time_first = float(df.decimal_hour[0])
-    time_last = float(df.decimal_hour[len(df)-1])
-       
-    hours, minutes, seconds = dec_hour_to_hms(time_first)
-    first = datetime.datetime.strptime(year + '_' + day + '_' + hours + '_' + minutes + '_' + seconds, '%Y_%j_%H_%M_%S')
-    #print(year + '_' + day + '_' + hours + '_' + minutes + '_' + seconds)
-   
-    hours, minutes, seconds = dec_hour_to_hms(time_last)
-    last = datetime.datetime.strptime(year + '_' + day + '_' + hours + '_' + minutes + '_' + seconds, '%Y_%j_%H_%M_%S')
-    #print(year + '_' + day + '_' + hours + '_' + minutes + '_' + seconds)
-    
-    if time_first > time_last:
-        reverse = 1
-        start = last
-        stop = first
-    else:
-        reverse = 0
-        start = first
-        stop = last
-        
-    return [start, stop, reverse]
-
-# ----- helper function to get full column name of a dataframe based on one string occurrence and a list of strings
-def column_name(df, str1, strings):
-    column_n =''
-    for column in df.columns:
-        if str1 in column:
-           for s in strings:
-               if  s in column:
-                   column_n = column
-    return column_n  
-
-# ----- helper function to get full column name of a dataframe based on a list of strings
-def column_name_single(df, strings):
-    column_n =''
-    for column in df.columns:
-
-       for s in strings:
-           if  s in column:
-               column_n = column
-    return column_n 
-
-# ----- function to read the rinex files and the navigation file
-def read_file_csv(fr, ft, system, NAV):
-
-    # -----------read the rinex file using python engine to use regex as delimiter
-    df_r = pd.read_csv(fr, sep='\s*,\s*', engine='python')
-    
-    # -----------read the nav file using python engine to use regex as delimiter    
-    if 'TRINAV' in NAV:
-        df_n = pd.read_csv(ft, sep='\s*,\s* ', engine='python')
-
-        # -----------TRINAV file is logged with an extra comma in the name when logged from rtDisplay, but not from QCPR
-        # -----------Get rid of the trailing comma in the first case
-        if ',' in (df_n.columns[-1]): 
-            df_n = df_n.rename(columns=({df_n.columns[-1]: df_n.columns[-1][:-1]}))
-            
-        # -----------TRINAV file is logged with an extra trailing comma when logged from rtDisplay, AND from QCPR
-        #------------Get rid of the comma if in the data  
-        #------------Horrible lambda!!!!, should be a def, (TODO)       
-        df_n[df_n.columns[-1]] = df_n[df_n.columns[-1]].apply(lambda s: s[:-1] if ',' in s else s)
-    
-    else:
-        df_n = pd.read_csv(ft, sep='\s*,\s*', engine='python')
- 
-    #print(df_n)
-    
-    # -----------convert gyro strings into float64
-    if 'TRINAV' in NAV:
-        if 'Gyro' in df_n.columns[-1] or 'gyro' in df_n.columns[-1]:
-            df_n[df_n.columns[-1]] = df_n[df_n.columns[-1]].apply(to_float)
-    else:
-        if 'THDG' in df_n.columns[-1]:
-            df_n[df_n.columns[-1]] = df_n[df_n.columns[-1]].apply(to_float)
-            
-                            
-    # -----------convert lat lon strings into dms float64
-    for key, value in df_n.dtypes.items():
-        for s in ['lat','Lat','LAT','lon','Lon','LON']:         
-            if s in key:
-                df_n[key] = df_n[key].apply(dms_to_dec)                
-            
-
-    # # # -----------convert time to decimal day 
-    # df_r['decimal_day'] = df_r['decimal_hour'].apply(lambda x: round(float(x) / 24, 6))
-    
-    # if 'TRINAV' in NAV:
-        # df_n['decimal_day'] = df_n['Time'].apply(lambda x: round((float(x) % 86400) / 86400, 6))
-    # else:
-        # name_column_gpstime = column_name_single(df_n, ['GPSTIME'])
-        # #----- SPN is a gps time seconds into the current gps week
-        # df_n['decimal_day'] = df_n[name_column_gpstime].apply(lambda x: round((float(x) % 86400) / 86400, 6))
-     
-               
-    # # -----------merge Navigation and rinex files by decimal_day, that is, by matching time
-    # df_m = pd.merge(df_r, df_n, how='inner', left_on='decimal_day', right_on='decimal_day')
-  
-  
-    # -----------convert time to gps seconds of the day 
-    df_r['day_seconds'] = df_r['decimal_hour'].apply(lambda x: int(round(float(x) * 3600, 1)))
-   
-    # -----------convert time to gps seconds of the day 
-    if 'TRINAV' in NAV:
-        df_n['day_seconds'] = df_n['Time'].apply(lambda x: (int(x) % 86400))
-    else:
-        name_column_gpstime = column_name_single(df_n, ['GPSTIME'])
-        #----- SPN is gps time seconds into the current gps week
-        df_n['day_seconds'] = df_n[name_column_gpstime].apply(lambda x: (int(x) % 86400))
-    #print (df_r['day_seconds'], df_n['day_seconds'])      
-
-        
-    # -----------merge Navigation and rinex files by decimal_day, that is, by matching time
-    df_m = pd.merge(df_r, df_n, how='inner', left_on='day_seconds', right_on='day_seconds')
-
-
-    # -----------if there is no matching time between Navigation and rinex exit with a message.
-    if len(df_m) == 0: 
-        tk.messagebox.showerror(title="No matching Epoch", message="The rinex file and the Navigation log \n do not have matching times")
-        exit
-    
-    # -----------reverse the dataframe for plotting from earlier to later date
-    first, last, reverse = start_stop_df_m (df_m)
-    if reverse == 1:
-        df_m = df_m[::-1]
-
-    # -----------output dataframe to csv for testing
-    df_m.to_csv('C:/tmp/combined_data.csv', sep=',', encoding='utf-8', index=False)
-
-    # -----------lat and lon factor degree->metres --(the maths are taken from Willy's original spreadsheet)
-    lat_mean = df_m['latitude_decimal_degree'].mean()
+    # ----- df is sorted on day_seconds by process_system, so the first and last rows with a rinex position
+    # ----- are start and stop. Without any position fall back to the first and last rows
+    valid = np.flatnonzero(~np.isnan(df['latitude_decimal_degree'].to_numpy(dtype=float)))
+    if len(valid) == 0:
+        valid = np.array([0, len(df) - 1])
+
+    # ----- get the first year and day. Use it for both start and end of matching records
+    year = int(df['year'].iat[valid[0]])
+    day = int(df['day_of_year'].iat[valid[0]])
+
+    # ----- get the first and last decimal hour of matching records
+    time_first = float(df['decimal_hour'].iat[valid[0]])
+    time_last = float(df['decimal_hour'].iat[valid[-1]])
+
+    # ----- decimal hours are rounded to the nearest second, as the day_seconds merge key is
+    base = datetime.datetime(year, 1, 1) + datetime.timedelta(days=day - 1)
+    first = base + datetime.timedelta(seconds=round(time_first * 3600))
+    last = base + datetime.timedelta(seconds=round(time_last * 3600))
+
+    return first, last
+
+# ----- helper function to get full column name of a dataframe based on one string occurrence and a compiled pattern
+def column_name(df, str1, pattern):
+    mask = df.columns.str.contains(str1, regex=False) & df.columns.str.contains(pattern)
+    return df.columns[mask][-1] if mask.any() else ''
+
+# ----- helper function to get full column name of a dataframe based on a compiled pattern
+def column_name_single(df, pattern):
+    mask = df.columns.str.contains(pattern)
+    return df.columns[mask][-1] if mask.any() else ''
+
+# ----- helper function to strip the blanks around the values of a text column
+def strip_column(s):
+    # -----------only text is stripped. pyarrow reads times and dates of day into time and date values, leave them
+    if pd.api.types.infer_dtype(s, skipna=True) != 'string':
+        return s
+    s = s.str.strip()
+
+    # -----------pyarrow does not skip the blank after the comma, so numbers may still be text here
+    try:
+        return pd.to_numeric(s)
+    except (ValueError, TypeError):
+        return s
+
+# ----- helper function to read a comma separated file and strip the blanks around the values
+def read_csv_stripped(path):
+    # -----------the multithreaded pyarrow reader is tried first. It may not be installed and it refuses
+    # -----------records with more fields than the header, in both cases fall back to the C engine
+    # -----------pandas reports the ArrowInvalid of those records as a ParserError
+    try:
+        df = pd.read_csv(path, sep=',', engine='pyarrow')
+    except (ImportError, pd.errors.ParserError):
+        # -----------index_col=False drops the extra empty field of records logged with a trailing comma
+        df = pd.read_csv(path, sep=',', engine='c', skipinitialspace=True, index_col=False)
+    df.columns = df.columns.str.strip()
+
+    # -----------a trailing comma in the header gives an empty (or 'Unnamed') column, get rid of it
+    df = df.loc[:, ~(df.columns.str.startswith('Unnamed') | (df.columns == ''))]
+
+    return df.apply(strip_column)
+
+# ----- count, mean, sum of squared deviations, min and max of every column of a chunk, NaN values skipped
+def chunk_moments(values):
+    valid = ~np.isnan(values)
+    n = valid.sum(axis=0).astype(np.float64)
+    mean = np.divide(np.where(valid, values, 0).sum(axis=0), n, out=np.zeros_like(n), where=n > 0)
+    m2 = (np.where(valid, values - mean, 0) ** 2).sum(axis=0)
+    mn = np.where(valid, values, np.inf).min(axis=0, initial=np.inf)
+    mx = np.where(valid, values, -np.inf).max(axis=0, initial=-np.inf)
+    return np.vstack((n, mean, m2, mn, mx))
+
+# ----- same as chunk_moments written as plain loops, only used when compiled by numba
+def chunk_moments_loop(values):
+    rows, k = values.shape
+    out = np.zeros((5, k))
+    for j in range(k):
+        n = 0
+        total = 0.0
+        mn = np.inf
+        mx = -np.inf
+        for i in range(rows):
+            v = values[i, j]
+            if not np.isnan(v):
+                n += 1
+                total += v
+                if v < mn:
+                    mn = v
+                if v > mx:
+                    mx = v
+        mean = total / n if n > 0 else 0.0
+        m2 = 0.0
+        for i in range(rows):
+            v = values[i, j]
+            if not np.isnan(v):
+                m2 += (v - mean) ** 2
+        out[0, j] = n
+        out[1, j] = mean
+        out[2, j] = m2
+        out[3, j] = mn
+        out[4, j] = mx
+    return out
+
+# ----- numba is optional: when installed the loops are compiled and replace the numpy version
+# ----- no fastmath, it assumes there are no NaN values. The .exe has no source tree to cache the compiled code in
+if numba is not None:
+    chunk_moments = numba.njit(cache=not getattr(sys, 'frozen', False))(chunk_moments_loop)
+
+# ----- running statistics of difference columns, updated one chunk at a time so the columns are never held whole
+# ----- all the columns are reduced in the same pass, chunks are combined with the parallel form of Welford's
+# ----- algorithm (Chan et al.)
+class DiffStats:
+    def __init__(self, columns):
+        self.columns = list(columns)
+        k = len(self.columns)
+        self.count = np.zeros(k)
+        self.mean = np.zeros(k)
+        self.m2 = np.zeros(k)
+        self.min = np.full(k, np.inf)
+        self.max = np.full(k, -np.inf)
+
+    def update(self, df):
+        n, mean, m2, mn, mx = chunk_moments(df[self.columns].to_numpy(dtype=np.float64))
+        delta = mean - self.mean
+        total = self.count + n
+
+        self.mean += delta * np.divide(n, total, out=np.zeros_like(n), where=total > 0)
+        self.m2 += m2 + delta ** 2 * np.divide(self.count * n, total, out=np.zeros_like(n), where=total > 0)
+        self.count = total
+        self.min = np.minimum(self.min, mn)
+        self.max = np.maximum(self.max, mx)
+
+    def finalize(self):
+        # -----------sample standard deviation, as DataFrame.describe() gives
+        std = np.sqrt(np.divide(self.m2, self.count - 1, out=np.full_like(self.m2, np.nan), where=self.count > 1))
+
+        # -----------a column without any value has no mean, min or max either
+        empty = self.count == 0
+        mean = np.where(empty, np.nan, self.mean)
+        mn = np.where(empty, np.nan, self.min)
+        mx = np.where(empty, np.nan, self.max)
+        return pd.DataFrame([self.count, mean, std, mn, mx],
+                            index=['count', 'mean', 'std', 'min', 'max'], columns=self.columns)
+
+# ----- function to get the lat and lon factor degree->metres at a latitude
+def degree_factors(lat_mean):
+    # -----------the maths are taken from Willy's original spreadsheet
+    # -----------WGS-84: second eccentricity squared e'2 = f(2-f)/(1-f)^2, V^2 = 1 + e'2.cos^2(lat), c = a/(1-f)
+    # -----------meridian radius M = c/V^3 for latitude, prime vertical radius N = c/V times cos(lat) for longitude
+    cos_lat = math.cos(lat_mean * math.pi / 180)
     f = 1 / 298.257223563
-    sq_ex = f * (2 + f) / (1 - f) ** 2
-    v2 = 1 + ((sq_ex ** 2) * math.cos(lat_mean / 180 * math.pi))
+    sq_ex = f * (2 - f) / (1 - f) ** 2
+    v2 = 1 + sq_ex * cos_lat ** 2
     c = 6378137 / (1 - f)
     lat_factor = c * math.pi / (v2 ** 1.5) / 180
-    lon_factor = lat_factor * math.cos(lat_mean * math.pi / 180)
+    lon_factor = c * math.pi / (v2 ** 0.5) / 180 * cos_lat
+    return lat_factor, lon_factor
+
+# ----- function returning what identifies the contents of a file: its path, modification time and size
+def file_key(path):
+    st = os.stat(path)
+    return os.path.abspath(path), st.st_mtime_ns, st.st_size
+
+# ----- function returning a digest of the script, or of the .exe when packaged by pyinstaller, and of the pandas
+# ----- and pyarrow versions. Any change to the code, its settings or the libraries reading the files changes it
+def script_key():
+    global SCRIPT_KEY
+    if SCRIPT_KEY is None:
+        digest = hashlib.sha1(repr((pd.__version__, pyarrow.__version__)).encode('utf-8'))
+        with open(sys.executable if getattr(sys, 'frozen', False) else os.path.abspath(__file__), 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        SCRIPT_KEY = digest.hexdigest()
+    return SCRIPT_KEY
+
+# ----- function returning the cache file for the given keys. The script is part of the key, so a changed
+# ----- script does not read what an older one cached
+def cache_file(*keys):
+    digest = hashlib.sha1(repr((script_key(),) + keys).encode('utf-8')).hexdigest()
+    return os.path.join(RINEX_CACHE_DIR, digest + '.parquet')
+
+# ----- function to mark a cache file as recently used, once it was read
+def touch_cache(path):
+    try:
+        os.utime(path)
+    except OSError:
+        pass
 
-    # -----------diff the systems
-    name_column_lat = column_name(df_n, system, ['LAT', 'lat', 'Lat'])
-    name_column_lon = column_name(df_n, system, ['LON', 'lon', 'Lon'])     
+# ----- function to remove a cache file that cannot be read, so the next run writes it again
+def drop_cache(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
 
-    df_m[system + '_lat_diff'] = df_m['latitude_decimal_degree'] - df_m[name_column_lat]
-    df_m[system + '_lon_diff'] = df_m['longitude_decimal_degree'] - df_m[name_column_lon]
-       
-    df_m[system + '_lat_diff'] = df_m[system + '_lat_diff'].apply(lambda x: x * lat_factor) 
-    df_m[system + '_lon_diff'] = df_m[system + '_lon_diff'].apply(lambda x: x * lon_factor)
+# ----- function to remove the cache files unused for RINEX_CACHE_DAYS, then the least recently used ones until
+# ----- the cache fits in RINEX_CACHE_SIZE. Run when no worker is reading or writing the cache
+def prune_cache():
+    try:
+        entries = [(entry.stat(), entry.path) for entry in os.scandir(RINEX_CACHE_DIR) if entry.is_file()]
+    except OSError:
+        return
+    entries.sort(key=lambda entry: entry[0].st_mtime, reverse=True)
+    oldest = time.time() - RINEX_CACHE_DAYS * 86400
+    size = 0
+    for st, path in entries:
+        size += st.st_size
+        if size > RINEX_CACHE_SIZE or st.st_mtime < oldest:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
 
-    # -----------convert 'Time' to datetime object and formate as HH:MM
-    if 'TRINAV' in NAV:
-        #-----------TRINAV
-        df_m['Time'] = df_m['Time'].apply(lambda x: gps2time(float(x)).strftime("%H:%M"))
-    else:
-        #-----------SPN
-        name_column_gpstime = column_name_single(df_n, ['GPSTIME'])        
-        df_m['Time'] = df_m[name_column_gpstime].apply(lambda x: gps2time(float(x)).strftime("%H:%M"))
+# ----- function to read the navigation file and prepare it for merging with the rinex records. The result is
+# ----- cached, so running the verification again on the same file does not parse it again
+def parse_navigation(ft, NAV):
+    if pyarrow is None:
+        return read_navigation(ft, NAV)
 
-    df_m.to_csv('C:/tmp/combined_data.csv', sep=',', encoding='utf-8', index=False)
+    path = cache_file('navigation', file_key(ft), NAV)
+    df_n = None
+    if os.path.isfile(path):
+        try:
+            df_n = pd.read_parquet(path)
+            touch_cache(path)
+        except (OSError, pyarrow.ArrowException):
+            drop_cache(path)
+    if df_n is None:
+        df_n = read_navigation(ft, NAV)
+        try:
+            os.makedirs(RINEX_CACHE_DIR, exist_ok=True)
+            df_n.to_parquet(path + '.' + str(os.getpid()), compression='zstd', index=False)
+            os.replace(path + '.' + str(os.getpid()), path)
+        except (OSError, pyarrow.ArrowException):
+            # -----------columns of mixed types cannot be written, the log is just parsed again next time
+            pass
 
+    # -----------the merged rinex records are cached under the navigation file they were merged with
+    df_n.attrs['source'] = (file_key(ft), NAV)
+    return df_n
 
-    return df_m
+# ----- function to read the navigation file, without the cache
+def read_navigation(ft, NAV):
 
-# -----------function to get statistics from each difference rinex-navigation
-def stats(df, system, type):
-    return df[system + '_' + type + '_diff'].describe()
+    # -----------read the nav file
+    # -----------TRINAV file is logged with an extra trailing comma when logged from rtDisplay AND from QCPR,
+    # -----------and with an extra comma in the header only from rtDisplay. read_csv_stripped copes with both
+    df_n = read_csv_stripped(ft)
+    
+    # -----------convert gyro strings into float64
+    if GYRO_RE.search(df_n.columns[-1]):
+        df_n[df_n.columns[-1]] = pd.to_numeric(df_n[df_n.columns[-1]], errors='coerce')
+                            
+    # -----------convert lat lon strings into dms float64
+    for key in df_n.columns:
+        if LAT_RE.search(key) or LON_RE.search(key):
+            df_n[key] = dms_to_dec_series(df_n[key])
 
-# -----------function to plot the gyros vs time
-def plot_gyros(df):
+    # -----------convert time to gps seconds of the day 
+    if 'TRINAV' in NAV:
+        gps_time = df_n['Time']
+    else:
+        #----- SPN is gps time seconds into the current gps week
+        gps_time = df_n[column_name_single(df_n, GPSTIME_RE)]
+    df_n['day_seconds'] = gps_time.astype(np.int64).to_numpy() % 86400
 
-    # -----------create axes to reuse
-    plt.rcParams.update({'font.size': 6})
+    # -----------'Time_dt' is kept as datetime for the plots
+    df_n['Time_dt'] = pd.to_datetime(gps_time.astype(float), unit='s', origin=GPS_EPOCH)
 
-    ax = plt.gca()
-    w = 5
-    l = 3
+    # -----------keep a single navigation record per second so every rinex epoch matches at most once
+    return df_n.drop_duplicates('day_seconds', keep='first')
+
+# ----- generator reading the needed rinex columns chunk by chunk, with their types given so they are not inferred.
+# ----- The pyarrow stream reader is used when installed, else the C engine of pandas
+def iter_rinex_chunks(fr, chunksize=RINEX_CHUNKSIZE):
+    started = False
+    if pyarrow is not None:
+        try:
+            # -----------the header has blanks after the commas, the pyarrow reader needs the column names as written
+            with open(fr) as f:
+                names = [name for name in f.readline().rstrip('\r\n').split(',') if name.strip() in RINEX_DTYPES]
+            reader = pyarrow.csv.open_csv(fr, read_options=pyarrow.csv.ReadOptions(block_size=RINEX_BLOCKSIZE),
+                                          convert_options=pyarrow.csv.ConvertOptions(
+                                              include_columns=names,
+                                              column_types={name: pyarrow.from_numpy_dtype(RINEX_DTYPES[name.strip()]) for name in names}))
+            for batch in reader:
+                df_r = batch.to_pandas()
+                df_r.columns = df_r.columns.str.strip()
+                started = True
+                yield df_r
+            return
+        except (pyarrow.ArrowInvalid, UnicodeDecodeError):
+            # -----------records with more fields than the header are refused, they are read by pandas below.
+            # -----------Past the first chunk there is no going back, so the error is left to the caller
+            if started:
+                raise
+
+    # -----------index_col=False drops the extra empty field of records logged with a trailing comma
+    reader = pd.read_csv(fr, sep=',', engine='c', skipinitialspace=True, index_col=False,
+                         usecols=lambda column: column.strip() in RINEX_DTYPES, dtype=RINEX_DTYPES, chunksize=chunksize)
+    for df_r in reader:
+        df_r.columns = df_r.columns.str.strip()
+        yield df_r
+
+# ----- generator reading the rinex file chunk by chunk and merging every chunk with the navigation records
+def iter_merged_chunks(fr, df_n, system, NAV, chunksize=RINEX_CHUNKSIZE):
+    name_column_lat = column_name(df_n, system, LAT_RE)
+    name_column_lon = column_name(df_n, system, LON_RE)
+    lat_factor = lon_factor = None
+    matched = 0
+
+    for df_r in iter_rinex_chunks(fr, chunksize):
+        # -----------convert time to gps seconds of the day 
+        df_r['day_seconds'] = np.rint(df_r['decimal_hour'].astype(float).to_numpy() * 3600).astype(np.int64)
+
+        # -----------only navigation records inside the time window of the chunk can match, drop the rest before the merge
+        lo, hi = df_r['day_seconds'].min(), df_r['day_seconds'].max()
+        df_n_window = df_n[df_n['day_seconds'].between(lo, hi)]
+
+        # -----------merge Navigation and rinex files by day_seconds, that is, by matching time
+        df_m = pd.merge(df_r, df_n_window, how='inner', on='day_seconds', validate='many_to_one')
+        if len(df_m) == 0:
+            continue
+
+        # -----------sort the dataframe for plotting from earlier to later date
+        df_m = df_m.sort_values('day_seconds', kind='stable', ignore_index=True)
+
+        # -----------the factors hardly change along a log, take them at the mean latitude of the first matching chunk
+        if lat_factor is None:
+            lat_factor, lon_factor = degree_factors(df_m['latitude_decimal_degree'].mean())
+
+        # -----------diff the systems
+        df_m[system + '_lat_diff'] = (df_m['latitude_decimal_degree'].to_numpy(dtype=float) - df_m[name_column_lat].to_numpy(dtype=float)) * lat_factor
+        df_m[system + '_lon_diff'] = (df_m['longitude_decimal_degree'].to_numpy(dtype=float) - df_m[name_column_lon].to_numpy(dtype=float)) * lon_factor
+
+        matched += len(df_m)
+        yield df_m
+
+    # -----------if there is no matching time between Navigation and rinex exit, the caller shows the message.
+    if matched == 0:
+        raise NoMatchingEpoch("The rinex file and the Navigation log \n do not have matching times")
+
+# ----- generator as iter_merged_chunks, reading the merged chunks back from the cache when the rinex file and the
+# ----- navigation log were merged before, and writing them to it otherwise. A chunk is a row group of the cache file
+def iter_merged_chunks_cached(fr, df_n, system, NAV):
+    # -----------a large rinex file would cost a second full write and crowd out everything else cached
+    if pyarrow is None or 'source' not in df_n.attrs or os.path.getsize(fr) > RINEX_CACHE_FILE_SIZE:
+        yield from iter_merged_chunks(fr, df_n, system, NAV)
+        return
+
+    path = cache_file('merged', file_key(fr), df_n.attrs['source'], system, NAV)
+    if os.path.isfile(path):
+        started = False
+        try:
+            cached = pyarrow.parquet.ParquetFile(path)
+            for i in range(cached.num_row_groups):
+                df_m = cached.read_row_group(i).to_pandas()
+                started = True
+                yield df_m
+            touch_cache(path)
+            return
+        except (OSError, pyarrow.ArrowException):
+            # -----------a damaged cache file is removed. Before the first chunk the rinex file is merged again,
+            # -----------past it the chunks already given cannot be taken back, so the error is left to the caller
+            drop_cache(path)
+            if started:
+                raise
+
+    # -----------the same system may be given twice and be merged by two processes at once
+    tmp = path + '.' + str(os.getpid())
+    writer = None
+    complete = False
+    try:
+        for df_m in iter_merged_chunks(fr, df_n, system, NAV):
+            if writer is not False:
+                try:
+                    table = pyarrow.Table.from_pandas(df_m, preserve_index=False)
+                    if writer is None:
+                        os.makedirs(RINEX_CACHE_DIR, exist_ok=True)
+                        writer = pyarrow.parquet.ParquetWriter(tmp, table.schema, compression='zstd')
+                    writer.write_table(table.cast(writer.schema), row_group_size=len(df_m))
+                except (OSError, pyarrow.ArrowException):
+                    # -----------the chunk cannot be cached, the file will be merged again next time
+                    if writer is not None:
+                        writer.close()
+                        os.remove(tmp)
+                    writer = False
+            yield df_m
+        complete = True
+    finally:
+        # -----------the cache is only kept when every chunk was written
+        if writer:
+            writer.close()
+            if complete:
+                os.replace(tmp, path)
+            else:
+                os.remove(tmp)
+
+# -----------function to keep every step-th record of df so no more than points records are drawn
+def decimate_for_plot(df, points=PLOT_POINTS):
+    step = max(1, len(df) // points)
+    return df.iloc[::step]
+
+# -----------function to draw all the columns of y against x as a single LineCollection, one draw call for all
+# -----------the lines. Returns legend handles, the collection itself has no per-line legend entries
+def plot_lines(ax, x, y, colors, linewidth):
+    x = mdates.date2num(x)
+    segments = [np.column_stack((x, y[:, j])) for j in range(y.shape[1])]
+    ax.xaxis_date()
+    ax.add_collection(LineCollection(segments, colors=colors, linewidths=linewidth))
+    ax.update_datalim(np.column_stack((np.tile(x, y.shape[1]), y.ravel(order='F'))))
+    ax.autoscale_view()
+    return [Line2D([], [], color=color, linewidth=linewidth) for color in colors]
+
+# -----------function to plot the gyros vs time on the reused axes of fig
+def plot_gyros(df, system, ax, fig):
+
+    # -----------clear what the previous plot left on the axes
+    ax.clear()
 
     # -----------set title, axis labels and scale, grid
-    plt.title('Gyro heading ')
-    plt.xlabel('Time [hh:mm]')
-    plt.ylabel('Bearing [°]')
+    ax.set_title('Gyro heading ')
+    ax.set_xlabel('Time [hh:mm]')
+    ax.set_ylabel('Bearing [°]')
     # -----------set y-axis scale
-    average = 0
     minvalue = 0
     maxvalue = 0
 
-    # -----------plot Gyros
-    for column in df.columns:
-        if 'Gyro' in column or 'gyro' in column or 'THDG' in column:
-            try:
-                minvalue = int(df[column].min())
-                maxvalue = int(df[column].max())
-                average = int(df[column].mean())
-                df.plot(figsize=(w, l), kind='line', x='Time', y=column, linewidth=1, ax=ax)
-            except:
-                pass
-    plt.ylim(minvalue - 10, maxvalue + 10)
-    plt.grid()
-
-    plt.xlabel('Time [hh:mm]')
-
-    plt.savefig('gyros.png')
-
-    # -----------clear current figure
-    plt.clf()
+    # -----------plot all the Gyros in one go
+    df = decimate_for_plot(df)
+    gyros = df.filter(regex=GYRO_RE.pattern).apply(pd.to_numeric, errors='coerce').dropna(axis=1, how='all')
+    if len(gyros.columns) > 0:
+        limits = gyros.agg(['min', 'max'])
+        minvalue = int(limits.loc['min'].min())
+        maxvalue = int(limits.loc['max'].max())
+        cycle = matplotlib.rcParams['axes.prop_cycle'].by_key()['color']
+        colors = [cycle[j % len(cycle)] for j in range(len(gyros.columns))]
+        handles = plot_lines(ax, df['Time_dt'].to_numpy(), gyros.to_numpy(dtype=np.float64), colors, 1)
+        ax.legend(handles, gyros.columns)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    ax.set_ylim(minvalue - 10, maxvalue + 10)
+    ax.grid(True)
+
+    # -----------one file per system, systems are plotted at the same time in different processes
+    fig.savefig(system + '_gyros.png', dpi=100, bbox_inches=None)
+
+# -----------function to plot the difference between a rinex file and navigation log on the reused axes of fig
+def plot_diff(df, system, ax, fig):
+
+    # -----------clear what the previous plot left on the axes
+    ax.clear()
 
-# -----------function to plot the difference between a rinex file and navigation log
-def plot_diff(df, system):
-
-    # -----------create axes to reuse
-    plt.rcParams.update({'font.size': 6})
-
-    ax = plt.gca()
-    w = 5
-    l = 3
     # -----------plot the time series
-    df.plot(figsize=(w, l), kind='line', x='Time', y=system + '_lat_diff', color='red', linewidth=0.15, ax=ax)
-    df.plot(figsize=(w, l), kind='line', x='Time', y=system + '_lon_diff', color='blue', linewidth=0.15, ax=ax)
+    df = decimate_for_plot(df)
+    columns = [system + '_lat_diff', system + '_lon_diff']
+    handles = plot_lines(ax, df['Time_dt'].to_numpy(), df[columns].to_numpy(dtype=np.float64), ['red', 'blue'], 0.15)
+    ax.xaxis.set_major_formatter(mdates.DateFormatter('%H:%M'))
+    ax.legend(handles, columns)
 
     # -----------set title, axis labels and scale, grid
-    plt.title(system + ' - Difference between RINEX processed and NAVIGATION logged ')
-    plt.xlabel('Time [hh:mm]')
-    plt.ylabel('Difference [m]')
+    ax.set_title(system + ' - Difference between RINEX processed and NAVIGATION logged ')
+    ax.set_xlabel('Time [hh:mm]')
+    ax.set_ylabel('Difference [m]')
     
     # -----------set y-axis scale
-    plt.ylim(-1, 1)
-    plt.grid(.5)
-
-    # -----------plt.show()
-    plt.savefig(system + '.png')
-
-    # -----------clear current figure
-    plt.clf()
+    ax.set_ylim(-1, 1)
+    ax.grid(True)
+
+    fig.savefig(system + '.png', dpi=100, bbox_inches=None)
+
+# -----------function to produce the merged dataframe, plots and statistics of one system. Runs in a worker process
+# -----------df_n is the navigation file as returned by parse_navigation, parsed once for all the systems
+def process_system(system, file, df_n, nav):
+    # -----------the rinex file is streamed: statistics are accumulated and only a decimated copy is kept for the plots
+    diff_stats = DiffStats([system + '_lat_diff', system + '_lon_diff'])
+    plot_chunks = []
+    for df_m in iter_merged_chunks_cached(file, df_n, system, nav):
+        diff_stats.update(df_m)
+
+        # -----------output dataframe to csv for testing, with 'Time' formatted as HH:MM for tabular output.
+        # -----------One file per system, the systems are processed at the same time
+        if STAGE == 'testing':
+            df_m.assign(Time=df_m['Time_dt'].dt.strftime('%H:%M')).to_csv('C:/tmp/combined_data_' + system + '.csv', sep=',', encoding='utf-8',
+                                                                          index=False, mode='a' if plot_chunks else 'w', header=not plot_chunks)
+
+        # -----------keep every step-th record, and always the last one for the stop time
+        step = max(1, len(df_m) // PLOT_ROWS_PER_CHUNK)
+        plot_chunks.append(df_m.iloc[np.union1d(np.arange(0, len(df_m), step), [len(df_m) - 1])])
+
+    df_plot = pd.concat(plot_chunks, ignore_index=True).sort_values('day_seconds', kind='stable', ignore_index=True)
+    del plot_chunks
+
+    # -----------each plot is drawn on its own pyplot-free Figure, nothing is left in pyplot's global state
+    fig_diff = Figure(figsize=(5, 3))
+    plot_diff(df_plot, system, fig_diff.subplots(), fig_diff)
+    fig_gyros = Figure(figsize=(5, 3))
+    plot_gyros(df_plot, system, fig_gyros.subplots(), fig_gyros)
+
+    fig_paths = (system + '.png', system + '_gyros.png')
+    stats_lat_lon = diff_stats.finalize()
+    return system, start_stop_df_m(df_plot), stats_lat_lon[system + '_lat_diff'], stats_lat_lon[system + '_lon_diff'], fig_paths
 
 def add_logo(pdf):
     try:
@@ -412,10 +711,33 @@ def cleanup(systems):
             os.remove(system + '.png')
         except:
             pass
+        try: 
+            os.remove(system + '_gyros.png')
+        except:
+            pass
 
-# -----------function to produce report
-def pdf_collect(systems, statistics, start_stop_times, descriptions, info, text_work_scope):
+# -----------generator yielding the result of every system in order, as process_system returns it, or None
+# -----------when the system has no file or could not be processed. Each result is waited for only when the report needs it
+def iter_results(futures):
+    for i, future in enumerate(futures):
+        if future is None:
+            yield None
+            continue
+        try:
+            result = future.result()
+        except NoMatchingEpoch as e:
+            tk.messagebox.showerror(title="No matching Epoch", message=str(e))
+            result = None
+        except (OSError, pd.errors.ParserError, ValueError, KeyError, TypeError, BrokenProcessPool) as e:
+            print ("cannot produce merged dataframe on system:" + str(i) + " - " + str(e))
+            result = None
+        yield result
+
+# -----------function to produce report, the system sections are written one by one as results come in
+def pdf_collect(results, descriptions, info):
     #-----------This def will produce a pdf report using FPDF
+    # -----------take the timetag once, so the report is written and opened under the same name
+    report = 'RINEX_verification_report' + timetag() + '.pdf'
     pdf = FPDF('P')
     
     # -----------Front page
@@ -433,10 +755,10 @@ def pdf_collect(systems, statistics, start_stop_times, descriptions, info, text_
     pdf.cell(180, 20, "DGNSS Verification - RINEX", 0, 1, 'C')
     pdf.ln(20)
     pdf.set_font('arial', 'B', 20)
-    pdf.cell(180, 15, info[0], 0, 2, 'C')
-    pdf.cell(180, 15, info[1], 0, 2, 'C')
-    pdf.cell(180, 15, info[2], 0, 2, 'C')
-    pdf.cell(180, 15, info[3], 0, 2, 'C')
+    pdf.cell(180, 15, info.vessel, 0, 2, 'C')
+    pdf.cell(180, 15, info.location, 0, 2, 'C')
+    pdf.cell(180, 15, info.client, 0, 2, 'C')
+    pdf.cell(180, 15, info.jobno, 0, 2, 'C')
 
     # -----------Second page introductory
     pdf.add_page()
@@ -454,12 +776,19 @@ def pdf_collect(systems, statistics, start_stop_times, descriptions, info, text_
     pdf.set_font('arial', '', 9)
     pdf.set_text_color(78, 78, 78)
 
-    pdf.multi_cell(170, 6, text_work_scope, 0)
+    pdf.multi_cell(170, 6, info.scope, 0)
 
-    for i, system in enumerate(systems):
+    # -----------the gyros are plotted for every system, report the ones of the last system processed ok
+    gyros_png = 'gyros.png'
+
+    for i, result in enumerate(results):
+        if result is None:
+            continue
+        system, start_stop, stats_lat, stats_lon, fig_paths = result
+        gyros_png = fig_paths[1]
         try:
-            start_logging = start_stop_times[system][0].strftime('%d-%m-%Y at %H:%M:%S')
-            stop_logging = start_stop_times[system][1].strftime('%d-%m-%Y at %H:%M:%S')
+            start_logging = start_stop[0].strftime('%d-%m-%Y at %H:%M:%S')
+            stop_logging = start_stop[1].strftime('%d-%m-%Y at %H:%M:%S')
             pdf.add_page()
             pdf.set_xy(10, 0)
             pdf.set_font('arial', 'B', 16)
@@ -475,7 +804,7 @@ def pdf_collect(systems, statistics, start_stop_times, descriptions, info, text_
             pdf.cell(160, 8, '                 Start logging  : ' + start_logging, 0, 2, 'L')
             pdf.cell(160, 8, '                 Stop logging  : ' + stop_logging, 0, 2, 'L')
             pdf.ln(3)
-            pdf.image(system + '.png')
+            pdf.image(fig_paths[0])
             pdf.ln(3)
             pdf.set_font('arial', 'B', 12)
 
@@ -491,10 +820,10 @@ def pdf_collect(systems, statistics, start_stop_times, descriptions, info, text_
                 pdf.cell(25)
                 pdf.cell(50, 10, names[stat], 1, 0, 'C')
                 if 'count' in stat:
-                    pdf.cell(80, 10, str('{:.0f}'.format(statistics[system + '_lat'][stat])), 1, 1, 'C')
+                    pdf.cell(80, 10, str('{:.0f}'.format(stats_lat[stat])), 1, 1, 'C')
                 else:
-                    pdf.cell(40, 10, str('{:.4f}'.format(statistics[system + '_lat'][stat])), 1, 0, 'C')
-                    pdf.cell(40, 10, str('{:.4f}'.format(statistics[system + '_lon'][stat])), 1, 1, 'C')
+                    pdf.cell(40, 10, str('{:.4f}'.format(stats_lat[stat])), 1, 0, 'C')
+                    pdf.cell(40, 10, str('{:.4f}'.format(stats_lon[stat])), 1, 1, 'C')
         except:
             pass
 
@@ -512,19 +841,19 @@ def pdf_collect(systems, statistics, start_stop_times, descriptions, info, text_
     pdf.set_font('arial', "", 12)
     pdf.cell(160, 8, '                 System  : Gyros', 0, 2, 'L')
     pdf.ln(3)
-    pdf.image('gyros.png')
+    pdf.image(gyros_png)
     pdf.ln(3)
     pdf.set_font('arial', 'B', 12)
 
     # -----------produce the actual report
-    print (timetag())
+    print (report)
     try:
-        pdf.output('RINEX_verification_report' + timetag() + '.pdf', 'F')
+        pdf.output(report, 'F')
     except:
         tk.messagebox.showerror(title="PDF open already", message="Please close the PDF produced on previous runs \nto overwrite it")
 
     try:
-        subprocess.Popen(['RINEX_verification_report' + timetag() + '.pdf'], shell=True)
+        subprocess.Popen([report], shell=True)
     except:
         pass
 
@@ -546,10 +875,10 @@ class Window(tk.Frame):
         self.description_system_3 = 'FUGRO G4 NG'
         self.description_system_4 = 'FUGRO XP NG'
 
-        self.file_1 = tk.StringVar()
-        self.file_2 = tk.StringVar()
-        self.file_3 = tk.StringVar()
-        self.file_4 = tk.StringVar()
+        self.file_1 = ''
+        self.file_2 = ''
+        self.file_3 = ''
+        self.file_4 = ''
         self.file_navigation = tk.StringVar()
 
     def init_window(self):
@@ -745,32 +1074,40 @@ class Window(tk.Frame):
         systems = [v1, v2, v3, v4]
         descriptions = [d1, d2, d3, d4]
         files = [self.file_1, self.file_2, self.file_3, self.file_4]
-        info = [self.entry_vessel.get(), self.entry_location.get(), self.entry_client.get(), self.entry_jobno.get()]
-        scope_work = self.text1.get('1.0',tk.END )
+        info = Info(self.entry_vessel.get(), self.entry_location.get(), self.entry_client.get(), self.entry_jobno.get(),
+                    self.text1.get('1.0',tk.END ))
 
-        statistics = {}
-        start_stop_times = {}
-        
-        # -----------produce the merged dataframe for each system
-        for i, system in enumerate(systems):
-            try:
-                df_merged = read_file_csv(files[i], self.file_navigation, system, self.nav)
-            except:
-                print ("cannot produce merged dataframe on system:" + str(i))
-                continue
-
-            plot_diff(df_merged, system)
-            plot_gyros(df_merged)
-
-            start_stop_times.update({system: start_stop_df_m(df_merged)})
-            
-            # -----------produce statistics            
-            statistics.update({system + '_lat': (stats(df_merged, system, 'lat'))})
-            statistics.update({system + '_lon': (stats(df_merged, system, 'lon'))})
+        # -----------the navigation file and type are the same for every system
+        file_navigation = self.file_navigation
+        nav = self.nav
+
+        # -----------parse the navigation file only once
+        try:
+            nav_df = parse_navigation(file_navigation, nav)
+        except Exception as e:
+            tk.messagebox.showerror(title="Navigation file", message="Cannot read the Navigation log file\n" + str(e))
+            return
         
-        # -----------produce the report 
-        pdf_collect(systems, statistics, start_stop_times, descriptions, info, scope_work)
-        cleanup(systems)
+        # -----------systems without a file are skipped here rather than failing in a worker
+        present = [isinstance(file, str) and os.path.isfile(file) for file in files]
+
+        # -----------produce the merged dataframe, plots and statistics for each system in parallel
+        try:
+            with ProcessPoolExecutor(max_workers=max(1, min(sum(present), os.cpu_count() or 1))) as executor:
+                # -----------the largest files are submitted first so a long one does not start last and hold the report.
+                # -----------futures stay in the order of the systems, which is the order of the report
+                futures = [None] * len(systems)
+                for i in sorted((i for i in range(len(systems)) if present[i]), key=lambda i: -os.path.getsize(files[i])):
+                    futures[i] = executor.submit(process_system, systems[i], files[i], nav_df, nav)
+
+                # -----------produce the report while the systems are processed, no result is kept once its section is written
+                pdf_collect(iter_results(futures), descriptions, info)
+
+            # -----------the workers are done with the cache
+            prune_cache()
+        finally:
+            # -----------the plots are removed even when the report could not be produced
+            cleanup(systems)
 
     def client_exit(self):
         self.quit()
@@ -780,6 +1117,8 @@ class Window(tk.Frame):
 
 # ----- MAIN -----#
 if __name__ == "__main__":
+    # ------needed by the worker processes of the pyinstaller .exe
+    multiprocessing.freeze_support()
     # ------call tk
     root = tk.Tk()
     #root.geometry("725x520")
@@ -791,9 +1130,9 @@ if __name__ == "__main__":
 #     fr = "C:/Users/empnav/Documents/CORAL_dataset/NG__270F.csv"
 #     ft = "C:/Users/empnav/Documents/CORAL_dataset/SPN_RINEX_Verification_Data"
 #     system = "COR_NG_XP_B"
-#     df_merged = read_file_csv(fr, ft, system)
+#     df_merged = pd.concat(iter_merged_chunks(fr, parse_navigation(ft, 'SPN'), system, 'SPN'), ignore_index=True)
 #     print (df_merged)
-#     first, last, reverse = start_stop_df_m (df_merged)
+#     first, last = start_stop_df_m (df_merged)
 
 
     